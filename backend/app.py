@@ -3,12 +3,22 @@ from flask_cors import CORS
 from datetime import datetime, timedelta
 import jwt
 import os
+import time
 from werkzeug.utils import secure_filename
 import bcrypt
 from config import Config
 from models.user import User
 from models.image import Image
+from models.gallery import GALLERY_PROJECTION, gallery_row
+from models.facet import Facet
+from models.trending import Trending
+from models.story import Story
+from models.generation_cache import GenerationCache
+from models.prompt_stats import PromptStats
 from utils.image_generator import ImageGenerator
+from utils.serializer import Serializer
+from utils.stats_refresher import StatsRefresher
+from utils.cache_warmer import CacheWarmer
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -17,6 +27,11 @@ CORS(app)
 if not os.path.exists(Config.UPLOAD_FOLDER):
     os.makedirs(Config.UPLOAD_FOLDER)
 
+@app.before_request
+def start_background_jobs():
+    StatsRefresher.start()
+    CacheWarmer.start()
+
 @app.route('/generated/<path:filename>')
 def serve_generated_image(filename):
     return send_from_directory(os.getcwd(), filename)
@@ -92,15 +107,33 @@ def generate_image():
     prompt = data.get('prompt')
     if not prompt:
         return jsonify({'error': 'Prompt is required'}), 400
+    PromptStats.record(prompt)
+    # 'fresh' skips the result cache when the user wants a new variation
+    if not data.get('fresh'):
+        cached = GenerationCache.get(prompt)
+        if cached:
+            GenerationCache.record_hit(cached)
+            return jsonify({'image': f"/generated/{cached['path']}", 'prompt': cached['generated_prompt']}), 200
     try:
+        started = time.perf_counter()
         image_path, generated_prompt = ImageGenerator.generate_image(prompt)
+        GenerationCache.record_miss(time.perf_counter() - started)
         if not image_path:
             return jsonify({'error': 'Image generation failed'}), 500
+        GenerationCache.put(prompt, image_path, generated_prompt, source='request')
         image_url = f"/generated/{image_path}"
         return jsonify({'image': image_url, 'prompt': generated_prompt}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@image_bp.route('/cache/stats', methods=['GET'], endpoint='cache_stats')
+@token_required
+def cache_stats():
+    hours = request.args.get('hours', 24, type=int)
+    if hours < 1 or hours > 24 * 30:
+        return jsonify({'error': 'hours must be between 1 and 720'}), 400
+    return jsonify(GenerationCache.report(hours, CacheWarmer.in_window)), 200
+
 @image_bp.route('/modify', methods=['POST'], endpoint='modify_image')
 @token_required
 def modify_image():
@@ -177,53 +210,122 @@ def generate_story():
     if not story_prompt or not isinstance(num_images, int) or num_images < 1 or num_images > 10:
         return jsonify({'error': 'Story prompt and valid number of images (1-10) are required'}), 400
     
+    story_id = Story.create(request.user_id, story_prompt, num_images)
+
+    def save_scene(index, path, introduction, text):
+        # Scenes are persisted as they complete so a failure can be resumed
+        if index == 0 and introduction:
+            Story.set_introduction(story_id, introduction)
+        if text:
+            Story.set_scene_text(story_id, index, text, text)
+        Story.set_scene_image(story_id, index, path)
+
     try:
-        story_result = ImageGenerator.generate_story(story_prompt, num_images)
-        if not story_result or any(scene['path'] is None for scene in story_result['scenes']):
-            return jsonify({'error': 'Story generation failed'}), 500
-        
-        formatted_scenes = [
+        story_result = ImageGenerator.generate_story(story_prompt, num_images, on_image=save_scene)
+        error = None
+        if story_result:
+            # Store the final text, which replaces text saved mid-stream
+            Story.set_introduction(story_id, story_result['introduction'])
+            for index, scene in enumerate(story_result['scenes']):
+                Story.set_scene_text(story_id, index, scene['text'], scene['prompt'])
+            error = story_result.get('error')
+        story = Story.update_status(story_id)
+        if len(Story.missing_scenes(story)) == num_images:
+            return jsonify({'error': error or 'Story generation failed', 'story_id': str(story_id)}), 500
+        return story_response(story, error)
+    except Exception as e:
+        Story.update_status(story_id)
+        return jsonify({'error': str(e), 'story_id': str(story_id)}), 500
+
+@image_bp.route('/story/<story_id>', methods=['GET'], endpoint='get_story')
+@token_required
+def get_story(story_id):
+    story = Story.find_by_id(story_id)
+    if not story or str(story['user_id']) != request.user_id:
+        return jsonify({'error': 'Story not found'}), 404
+    return story_response(story)
+
+@image_bp.route('/story/<story_id>/resume', methods=['POST'], endpoint='resume_story')
+@token_required
+def resume_story(story_id):
+    story = Story.find_by_id(story_id)
+    if not story or str(story['user_id']) != request.user_id:
+        return jsonify({'error': 'Story not found'}), 404
+
+    if story['status'] == 'complete':
+        return story_response(story)
+    story = Story.claim(story['_id'])
+    if not story:
+        return jsonify({'error': 'Story is still being generated'}), 409
+
+    # Only the scenes missing text or an image go back upstream
+    try:
+        for index in Story.missing_scenes(story):
+            scene = story['scenes'][index]
+            if scene['text']:
+                path, _ = ImageGenerator.generate_image(scene['prompt'] or scene['text'])
+            else:
+                # A scene with an image already only needs its text
+                text, path = ImageGenerator.generate_scene(
+                    story['story_prompt'], story['introduction'], index + 1, story['num_images'],
+                    with_image=not scene['path']
+                )
+                if path and not text:
+                    # Keep the new image and retry only the text
+                    text, _ = ImageGenerator.generate_scene(
+                        story['story_prompt'], story['introduction'], index + 1, story['num_images'],
+                        with_image=False
+                    )
+                if text:
+                    Story.set_scene_text(story['_id'], index, text, text)
+            if path:
+                Story.set_scene_image(story['_id'], index, path)
+        return story_response(Story.update_status(story['_id']))
+    except Exception as e:
+        Story.update_status(story['_id'])
+        return jsonify({'error': str(e), 'story_id': story_id}), 500
+
+def story_response(story, error=None):
+    body = {
+        'story_id': story['_id'],
+        'status': story['status'],
+        'introduction': story['introduction'],
+        'scenes': [
             {
                 'text': scene['text'],
-                'image': f"/generated/{scene['path']}",
+                'image': f"/generated/{scene['path']}" if scene['path'] else None,
                 'prompt': scene['prompt'],
-                'timestamp': datetime.now().strftime('%B %d, %Y - %I:%M%p')
+                'timestamp': scene['completed_at'].strftime('%B %d, %Y - %I:%M%p') if scene['completed_at'] else None
             }
-            for scene in story_result['scenes']
+            for scene in story['scenes']
         ]
-        return jsonify({
-            'introduction': story_result['introduction'],
-            'scenes': formatted_scenes
-        }), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    }
+    if story['status'] != 'complete':
+        body['missing_scenes'] = Story.missing_scenes(story)
+        if error:
+            body['upstream_error'] = error
+        response = Serializer.response(body)
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    # Completed stories never change, let clients and proxies revalidate by ETag
+    response = Serializer.response(body)
+    response.set_etag(f"{story['_id']}-{int(story['updated_at'].timestamp())}")
+    response.headers['Cache-Control'] = f'private, max-age={Config.STORY_CACHE_MAX_AGE}'
+    return response.make_conditional(request)
 
 gallery_bp = Blueprint('gallery', __name__)
 
 @gallery_bp.route('/all', methods=['GET'], endpoint='get_all_images')
 def get_all_images():
-    images = Image.get_all()
-    return jsonify([{
-        'id': str(img['_id']),
-        'title': img['title'],
-        'category': img['category'],
-        'url': img['url'],
-        'likes': img['likes'],
-        'prompt': img.get('prompt', '')
-    } for img in images]), 200
+    images = Image.iter_all(GALLERY_PROJECTION)
+    return Serializer.stream_list(images, gallery_row)
 
 @gallery_bp.route('/user', methods=['GET'], endpoint='get_user_images')
 @token_required
 def get_user_images():
-    images = Image.find_by_user(request.user_id)
-    return jsonify([{
-        'id': str(img['_id']),
-        'title': img['title'],
-        'category': img['category'],
-        'url': img['url'],
-        'likes': img['likes'],
-        'prompt': img.get('prompt', '')
-    } for img in images]), 200
+    images = Image.iter_by_user(request.user_id, GALLERY_PROJECTION)
+    return Serializer.stream_list(images, gallery_row)
 
 @gallery_bp.route('/like/<image_id>', methods=['POST'], endpoint='like_image')
 @token_required
@@ -231,12 +333,36 @@ def like_image(image_id):
     image = Image.find_by_id(image_id)
     if not image:
         return jsonify({'error': 'Image not found'}), 404
-    Image.collection.update_one(
-        {'_id': image['_id']},
-        {'$set': {'likes': image['likes'] + 1 if image['likes'] == 0 else image['likes'] - 1}}
-    )
+    Image.set_likes(image, image['likes'] + 1 if image['likes'] == 0 else image['likes'] - 1)
     return jsonify({'message': 'Like toggled'}), 200
 
+@gallery_bp.route('/<image_id>', methods=['DELETE'], endpoint='delete_image')
+@token_required
+def delete_image(image_id):
+    image = Image.find_by_id(image_id)
+    if not image:
+        return jsonify({'error': 'Image not found'}), 404
+    if str(image['user_id']) != request.user_id:
+        return jsonify({'error': 'Not allowed to delete this image'}), 403
+    Image.delete(image)
+    return jsonify({'message': 'Image deleted'}), 200
+
+@gallery_bp.route('/facets', methods=['GET'], endpoint='get_facets')
+def get_facets():
+    facets = [{'category': facet['_id'], 'count': facet['count']} for facet in Facet.get_all()]
+    return Serializer.response({
+        'categories': facets,
+        'total': sum(facet['count'] for facet in facets)
+    })
+
+@gallery_bp.route('/trending', methods=['GET'], endpoint='get_trending')
+def get_trending():
+    limit = request.args.get('limit', 20, type=int)
+    if limit < 1 or limit > Config.TRENDING_MAX_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {Config.TRENDING_MAX_LIMIT}'}), 400
+    images = Trending.top(limit, request.args.get('category'))
+    return Serializer.stream_list(images, gallery_row)
+
 @app.route('/analyze-image', methods=['POST'])
 def analyze_image():
     if 'image' not in request.files:
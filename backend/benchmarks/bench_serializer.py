@@ -0,0 +1,85 @@
+"""
+Microbenchmark for the gallery list serialization.
+
+Compares the old path (materialize every row, then jsonify the whole list)
+with Serializer.stream_list on a 10k-row gallery page, reporting latency and
+peak traced memory. Run from the backend directory:
+
+    python -m benchmarks.bench_serializer [rows] [repeats]
+"""
+import sys
+import time
+import tracemalloc
+from bson.objectid import ObjectId
+from flask import Flask, jsonify
+from utils.serializer import Serializer, orjson, brotli
+from models.gallery import gallery_row
+
+app = Flask(__name__)
+
+
+def fake_cursor(rows):
+    # Stands in for a pymongo cursor: documents are produced one at a time
+    for i in range(rows):
+        yield {
+            '_id': ObjectId(),
+            'title': f"Image {i}",
+            'category': ('nature', 'portrait', 'abstract', 'anime')[i % 4],
+            'url': f"/generated/generated_image_{1743438342 + i}.png",
+            'likes': i % 7,
+            'prompt': f"a white baby goat going on adventure number {i} in a 3d cartoon animation style"
+        }
+
+
+def baseline(rows):
+    images = list(fake_cursor(rows))
+    response = jsonify([{
+        'id': str(img['_id']),
+        'title': img['title'],
+        'category': img['category'],
+        'url': img['url'],
+        'likes': img['likes'],
+        'prompt': img.get('prompt', '')
+    } for img in images])
+    return sum(len(chunk) for chunk in response.response)
+
+
+def streamed(rows):
+    response = Serializer.stream_list(fake_cursor(rows), gallery_row)
+    return sum(len(chunk) for chunk in response.response)
+
+
+def measure(fn, rows, repeats):
+    timings = []
+    peak = 0
+    size = 0
+    for _ in range(repeats):
+        tracemalloc.start()
+        start = time.perf_counter()
+        size = fn(rows)
+        timings.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    timings.sort()
+    return timings[len(timings) // 2], peak, size
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"rows={rows} repeats={repeats} orjson={orjson is not None} brotli={brotli is not None}")
+    cases = [
+        ('jsonify (baseline)', baseline, {}),
+        ('stream, identity', streamed, {}),
+        ('stream, gzip', streamed, {'Accept-Encoding': 'gzip'}),
+    ]
+    if brotli is not None:
+        cases.append(('stream, br', streamed, {'Accept-Encoding': 'br'}))
+    for name, fn, headers in cases:
+        with app.test_request_context(headers=headers):
+            latency, peak, size = measure(fn, rows, repeats)
+        print(f"{name:<20} median {latency * 1000:8.1f} ms  peak {peak / 1024:9.1f} KiB  body {size / 1024:9.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
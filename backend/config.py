@@ -7,4 +7,27 @@ class Config:
     MONGO_URI = os.getenv('MONGO_URI')
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here')
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
-    MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB max upload size
\ No newline at end of file
+    MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB max upload size
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # bytes before responses get compressed
+    STREAM_CHUNK_SIZE = 64 * 1024  # flush compressed streams in ~64KB chunks
+    GZIP_LEVEL = 6
+    BROTLI_QUALITY = 4
+    TRENDING_DECAY_SECONDS = 24 * 60 * 60  # likes lose ~63% of their weight per day
+    TRENDING_MAX_LIMIT = 100
+    STATS_REFRESH_INTERVAL = int(os.getenv('STATS_REFRESH_INTERVAL', 300))  # seconds, 0 only runs the first build
+    STATS_REFRESH_OVERLAP = 60
+    FACET_RECOUNT_INTERVAL = 60 * 60
+    STORY_CACHE_MAX_AGE = 24 * 60 * 60  # seconds completed stories may be cached by clients
+    STORY_CLAIM_TIMEOUT = 10 * 60  # seconds without progress before a running story can be resumed
+    CACHE_TTL_HOURS = int(os.getenv('CACHE_TTL_HOURS', 7 * 24))  # how long generated results are reused
+    CACHE_REFRESH_MARGIN_HOURS = 24  # warm entries that expire within this margin
+    CACHE_WARM_WINDOWS = os.getenv('CACHE_WARM_WINDOWS', '1-6')  # off-peak local hours, end exclusive, e.g. "22-6,13-14"
+    CACHE_WARM_DAILY_QUOTA = int(os.getenv('CACHE_WARM_DAILY_QUOTA', 50))  # upstream calls per day, 0 disables warming
+    CACHE_WARM_INTERVAL = 10 * 60
+    CACHE_WARM_TOP_PROMPTS = 100
+    CACHE_WARM_LOOKBACK_DAYS = 7
+    CACHE_WARM_LIKE_WEIGHT = 2
+    CACHE_STATS_RETENTION_DAYS = 30  # hourly hit-rate buckets kept for /image/cache/stats
+    CACHE_PURGE_GRACE_HOURS = 24  # expired entries the purge missed are dropped by the TTL index after this
+    CACHE_WARM_RETRY_HOURS = 6  # first backoff for a prompt that failed to warm, doubled on each failure
+    CACHE_WARM_MAX_BACKOFF_HOURS = 7 * 24
\ No newline at end of file
@@ -0,0 +1,50 @@
+from pymongo import MongoClient, DESCENDING
+from pymongo.errors import DuplicateKeyError
+from config import Config
+from datetime import datetime
+
+class Facet:
+    collection = MongoClient(Config.MONGO_URI).imagetales.category_facets
+
+    @classmethod
+    def ensure_indexes(cls):
+        cls.collection.create_index([('count', DESCENDING)])
+
+    @classmethod
+    def increment(cls, category, amount=1):
+        cls.collection.update_one(
+            {'_id': category},
+            {'$inc': {'count': amount}, '$set': {'updated_at': datetime.now()}},
+            upsert=True
+        )
+
+    @classmethod
+    def get_all(cls):
+        return cls.collection.find({'count': {'$gt': 0}}).sort('count', DESCENDING)
+
+    @classmethod
+    def rebuild(cls, images_collection):
+        """
+        Recount every category from the images. A category incremented after
+        the recount started is left alone, since the aggregate may not include
+        that change, and is corrected by the next recount instead.
+        """
+        started = datetime.now()
+        counts = {doc['_id']: doc['count'] for doc in images_collection.aggregate(
+            [{'$group': {'_id': '$category', 'count': {'$sum': 1}}}]
+        )}
+        for category in cls.collection.distinct('_id'):
+            counts.setdefault(category, 0)
+        for category, count in counts.items():
+            try:
+                cls.collection.update_one(
+                    {'_id': category, '$or': [
+                        {'updated_at': {'$lt': started}},
+                        {'updated_at': {'$exists': False}}
+                    ]},
+                    {'$set': {'count': count}},
+                    upsert=True
+                )
+            except DuplicateKeyError:
+                # The filter missed because of a newer increment, skip it
+                pass
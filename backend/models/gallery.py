@@ -0,0 +1,13 @@
+# Shape of gallery rows sent to the frontend. Kept free of database clients
+# so the serializer benchmark can import it on its own.
+GALLERY_PROJECTION = {'title': 1, 'category': 1, 'url': 1, 'likes': 1, 'prompt': 1}
+
+def gallery_row(img):
+    return {
+        'id': img['_id'],
+        'title': img['title'],
+        'category': img['category'],
+        'url': img['url'],
+        'likes': img['likes'],
+        'prompt': img.get('prompt', '')
+    }
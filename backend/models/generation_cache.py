@@ -0,0 +1,178 @@
+import hashlib
+import os
+import re
+from pymongo import MongoClient, ReturnDocument
+from config import Config
+from datetime import datetime, timedelta
+from models.image import Image
+
+class GenerationCache:
+    db = MongoClient(Config.MONGO_URI).imagetales
+    collection = db.generation_cache
+    stats = db.generation_cache_stats
+
+    failures = db.generation_cache_failures
+
+    @classmethod
+    def ensure_indexes(cls):
+        # purge_expired removes expired entries together with their files, the
+        # TTL index is only a backstop for entries it missed
+        cls.collection.create_index('expires_at', expireAfterSeconds=Config.CACHE_PURGE_GRACE_HOURS * 60 * 60)
+        cls.stats.create_index('hour', expireAfterSeconds=Config.CACHE_STATS_RETENTION_DAYS * 24 * 60 * 60)
+        cls.failures.create_index('retry_at', expireAfterSeconds=Config.CACHE_WARM_MAX_BACKOFF_HOURS * 60 * 60)
+
+    @staticmethod
+    def key(prompt):
+        # Treat prompts differing only in case or whitespace as the same request
+        normalized = ' '.join(prompt.lower().split())
+        return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def get(cls, prompt):
+        entry = cls.collection.find_one({'_id': cls.key(prompt), 'expires_at': {'$gt': datetime.now()}})
+        if not entry or not os.path.exists(entry['path']):
+            return None
+        return entry
+
+    @classmethod
+    def is_fresh(cls, prompt, margin):
+        entry = cls.collection.find_one({'_id': cls.key(prompt)}, {'expires_at': 1, 'path': 1})
+        return bool(entry) and entry['expires_at'] > datetime.now() + margin and os.path.exists(entry['path'])
+
+    @staticmethod
+    def _remove_file(path):
+        # Files saved to the gallery are still referenced by an Image. The
+        # frontend stores absolute URLs, so match on the path suffix.
+        if not path or Image.collection.find_one({'url': {'$regex': re.escape(f"/generated/{path}") + '$'}}, {'_id': 1}):
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def put(cls, prompt, path, generated_prompt, source):
+        now = datetime.now()
+        previous = cls.collection.find_one_and_update(
+            {'_id': cls.key(prompt)},
+            {'$set': {
+                'prompt': prompt,
+                'path': path,
+                'generated_prompt': generated_prompt,
+                'source': source,
+                'created_at': now,
+                'expires_at': now + timedelta(hours=Config.CACHE_TTL_HOURS)
+            }},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        if previous and previous['path'] != path:
+            cls._remove_file(previous['path'])
+
+    @classmethod
+    def purge_expired(cls):
+        """Delete expired entries and the image files only they pointed to."""
+        purged = 0
+        for entry in cls.collection.find({'expires_at': {'$lte': datetime.now()}}, {'path': 1}):
+            # Matching on path skips entries refreshed since the find
+            if cls.collection.delete_one({'_id': entry['_id'], 'path': entry['path']}).deleted_count:
+                cls._remove_file(entry['path'])
+                purged += 1
+        return purged
+
+    @classmethod
+    def should_skip(cls, prompt):
+        failure = cls.failures.find_one({'_id': cls.key(prompt)})
+        return bool(failure) and failure['retry_at'] > datetime.now()
+
+    @classmethod
+    def record_failure(cls, prompt, error):
+        """Back off a prompt that failed to warm, doubling the delay each time."""
+        key = cls.key(prompt)
+        failure = cls.failures.find_one_and_update(
+            {'_id': key},
+            {'$inc': {'failures': 1}, '$set': {'prompt': prompt, 'error': error}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        hours = min(Config.CACHE_WARM_RETRY_HOURS * 2 ** (failure['failures'] - 1), Config.CACHE_WARM_MAX_BACKOFF_HOURS)
+        cls.failures.update_one({'_id': key}, {'$set': {'retry_at': datetime.now() + timedelta(hours=hours)}})
+
+    @classmethod
+    def clear_failure(cls, prompt):
+        cls.failures.delete_one({'_id': cls.key(prompt)})
+
+    @classmethod
+    def _record(cls, counters):
+        hour = datetime.now().replace(minute=0, second=0, microsecond=0)
+        cls.stats.update_one(
+            {'_id': hour.strftime('%Y-%m-%dT%H')},
+            {'$inc': counters, '$setOnInsert': {'hour': hour}},
+            upsert=True
+        )
+
+    @classmethod
+    def record_hit(cls, entry):
+        counters = {'hits': 1}
+        if entry.get('source') == 'warm':
+            counters['warm_hits'] = 1
+        cls._record(counters)
+
+    @classmethod
+    def record_miss(cls, upstream_seconds):
+        cls._record({'misses': 1, 'upstream_calls': 1, 'upstream_seconds': upstream_seconds})
+
+    @classmethod
+    def record_warm(cls, upstream_seconds):
+        cls._record({'warmed': 1, 'upstream_calls': 1, 'upstream_seconds': upstream_seconds})
+
+    @classmethod
+    def report(cls, hours, is_off_peak):
+        """Hit rates over the last `hours` hourly buckets, split into peak and off-peak."""
+        since = (datetime.now() - timedelta(hours=hours)).strftime('%Y-%m-%dT%H')
+        names = ('hits', 'warm_hits', 'misses', 'warmed', 'upstream_calls', 'upstream_seconds')
+        totals = {'all': dict.fromkeys(names, 0), 'peak': dict.fromkeys(names, 0)}
+        for bucket in cls.stats.find({'_id': {'$gte': since}}):
+            scopes = ['all'] if is_off_peak(int(bucket['_id'][-2:])) else ['all', 'peak']
+            for scope in scopes:
+                for name in names:
+                    totals[scope][name] += bucket.get(name, 0)
+
+        report = {'hours': hours}
+        for scope, counts in totals.items():
+            requests = counts['hits'] + counts['misses']
+            avg_upstream = counts['upstream_seconds'] / counts['upstream_calls'] if counts['upstream_calls'] else 0
+            report[scope] = {
+                'requests': requests,
+                'hits': counts['hits'],
+                'warm_hits': counts['warm_hits'],
+                'hit_rate': counts['hits'] / requests if requests else 0,
+                'warm_hit_rate': counts['warm_hits'] / requests if requests else 0,
+                'avg_upstream_seconds': avg_upstream,
+                # Every hit skipped one upstream call of roughly average length
+                'upstream_seconds_saved': counts['hits'] * avg_upstream,
+                'warm_upstream_seconds_saved': counts['warm_hits'] * avg_upstream
+            }
+        report['all']['warmed'] = totals['all']['warmed']
+        return report
+
+    @classmethod
+    def take_quota(cls, limit):
+        """Atomically claim one warm-up generation from today's quota."""
+        today = datetime.now().strftime('%Y-%m-%d')
+        job_state = cls.db.job_state
+        job_state.update_one(
+            {'_id': 'cache_warm_quota', 'date': {'$ne': today}},
+            {'$set': {'date': today, 'used': 0}}
+        )
+        job_state.update_one(
+            {'_id': 'cache_warm_quota'},
+            {'$setOnInsert': {'date': today, 'used': 0}},
+            upsert=True
+        )
+        claimed = job_state.find_one_and_update(
+            {'_id': 'cache_warm_quota', 'date': today, 'used': {'$lt': limit}},
+            {'$inc': {'used': 1}},
+            return_document=ReturnDocument.AFTER
+        )
+        return claimed is not None
@@ -1,6 +1,8 @@
 from pymongo import MongoClient
 from config import Config
 from datetime import datetime  # Import datetime here too
+from models.facet import Facet
+from models.trending import Trending
 
 class Image:
     collection = MongoClient(Config.MONGO_URI).imagetales.images
@@ -8,31 +10,71 @@ class Image:
     @classmethod
     def create(cls, user_id, title, category, url, prompt):  # Added prompt parameter
         from bson.objectid import ObjectId
-        result = cls.collection.insert_one({
+        now = datetime.now()
+        image = {
             'user_id': ObjectId(user_id),
             'title': title,
             'category': category,
             'url': url,
             'prompt': prompt,  # Add prompt to the document
             'likes': 0,
-            'created_at': datetime.now()
-        })
+            'created_at': now,
+            'updated_at': now
+        }
+        result = cls.collection.insert_one(image)
+        # Keep the gallery facets and trending view in step with the images
+        Facet.increment(category, 1)
+        Trending.upsert(image)
         return result.inserted_id
+
+    @classmethod
+    def delete(cls, image):
+        result = cls.collection.delete_one({'_id': image['_id']})
+        if result.deleted_count:
+            Facet.increment(image['category'], -1)
+            Trending.remove(image['_id'])
+        return result.deleted_count
+
+    @classmethod
+    def set_likes(cls, image, likes):
+        cls.collection.update_one(
+            {'_id': image['_id']},
+            {'$set': {'likes': likes, 'updated_at': datetime.now()}}
+        )
+        Trending.upsert(dict(image, likes=likes))
+
+    @classmethod
+    def find_updated_since(cls, since):
+        query = {'updated_at': {'$gte': since}} if since else {}
+        return cls.collection.find(query)
     
 
     @classmethod
     def get_all(cls):
         return list(cls.collection.find())
 
+    @classmethod
+    def iter_all(cls, projection=None):
+        return cls.collection.find({}, projection)
+
     @classmethod
     def find_by_user(cls, user_id):
         from bson.objectid import ObjectId
         return list(cls.collection.find({'user_id': ObjectId(user_id)}))
 
+    @classmethod
+    def iter_by_user(cls, user_id, projection=None):
+        from bson.objectid import ObjectId
+        return cls.collection.find({'user_id': ObjectId(user_id)}, projection)
+
     @classmethod
     def find_by_id(cls, image_id):
         from bson.objectid import ObjectId
-        return cls.collection.find_one({'_id': ObjectId(image_id)})
+        from bson.errors import InvalidId
+        try:
+            return cls.collection.find_one({'_id': ObjectId(image_id)})
+        except InvalidId:
+            return None
     
     @classmethod
     def find_by_url(cls, url):
@@ -0,0 +1,60 @@
+from pymongo import MongoClient
+from config import Config
+from datetime import datetime, timedelta
+from models.generation_cache import GenerationCache
+from models.image import Image
+
+class PromptStats:
+    collection = MongoClient(Config.MONGO_URI).imagetales.prompt_stats
+
+    @classmethod
+    def ensure_indexes(cls):
+        # Serves the lookback range match and drops buckets once they fall out of it
+        cls.collection.create_index(
+            'day', expireAfterSeconds=(Config.CACHE_WARM_LOOKBACK_DAYS + 1) * 24 * 60 * 60
+        )
+
+    @classmethod
+    def record(cls, prompt):
+        # One counter per prompt per day so popularity only counts recent requests
+        key = GenerationCache.key(prompt)
+        day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        cls.collection.update_one(
+            {'_id': f"{key}:{day.strftime('%Y-%m-%d')}"},
+            {'$inc': {'requests': 1}, '$set': {'key': key, 'prompt': prompt, 'day': day}},
+            upsert=True
+        )
+
+    @classmethod
+    def popular(cls, limit):
+        """
+        Rank prompts by their request count over the lookback window plus
+        likes and saves of gallery images using the same prompt.
+        """
+        since = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) \
+            - timedelta(days=Config.CACHE_WARM_LOOKBACK_DAYS)
+        scores = {}
+        prompts = {}
+        requested = cls.collection.aggregate([
+            {'$match': {'day': {'$gte': since}}},
+            {'$group': {'_id': '$key', 'prompt': {'$last': '$prompt'}, 'requests': {'$sum': '$requests'}}},
+            {'$sort': {'requests': -1}},
+            {'$limit': limit}
+        ])
+        for stat in requested:
+            scores[stat['_id']] = stat['requests']
+            prompts[stat['_id']] = stat['prompt']
+
+        liked = Image.collection.aggregate([
+            {'$match': {'prompt': {'$nin': [None, '']}}},
+            {'$group': {'_id': '$prompt', 'likes': {'$sum': '$likes'}, 'saves': {'$sum': 1}}},
+            {'$sort': {'likes': -1, 'saves': -1}},
+            {'$limit': limit}
+        ])
+        for group in liked:
+            key = GenerationCache.key(group['_id'])
+            scores[key] = scores.get(key, 0) + Config.CACHE_WARM_LIKE_WEIGHT * group['likes'] + group['saves']
+            prompts.setdefault(key, group['_id'])
+
+        ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+        return [prompts[key] for key in ranked]
@@ -0,0 +1,92 @@
+from pymongo import MongoClient, ReturnDocument
+from config import Config
+from datetime import datetime, timedelta
+
+class Story:
+    collection = MongoClient(Config.MONGO_URI).imagetales.stories
+
+    @classmethod
+    def create(cls, user_id, story_prompt, num_images):
+        from bson.objectid import ObjectId
+        now = datetime.now()
+        result = cls.collection.insert_one({
+            'user_id': ObjectId(user_id),
+            'story_prompt': story_prompt,
+            'num_images': num_images,
+            'introduction': None,
+            # One slot per scene so scenes can be filled in as they complete
+            'scenes': [{'text': None, 'prompt': None, 'path': None, 'completed_at': None}
+                       for _ in range(num_images)],
+            'status': 'pending',
+            'created_at': now,
+            'updated_at': now
+        })
+        return result.inserted_id
+
+    @classmethod
+    def find_by_id(cls, story_id):
+        from bson.objectid import ObjectId
+        from bson.errors import InvalidId
+        try:
+            return cls.collection.find_one({'_id': ObjectId(story_id)})
+        except InvalidId:
+            return None
+
+    @classmethod
+    def set_introduction(cls, story_id, introduction):
+        cls.collection.update_one(
+            {'_id': story_id},
+            {'$set': {'introduction': introduction, 'updated_at': datetime.now()}}
+        )
+
+    @classmethod
+    def set_scene_text(cls, story_id, index, text, prompt):
+        cls.collection.update_one(
+            {'_id': story_id},
+            {'$set': {
+                f'scenes.{index}.text': text,
+                f'scenes.{index}.prompt': prompt,
+                'updated_at': datetime.now()
+            }}
+        )
+
+    @classmethod
+    def set_scene_image(cls, story_id, index, path):
+        now = datetime.now()
+        cls.collection.update_one(
+            {'_id': story_id},
+            {'$set': {
+                f'scenes.{index}.path': path,
+                f'scenes.{index}.completed_at': now,
+                'updated_at': now
+            }}
+        )
+
+    @classmethod
+    def claim(cls, story_id):
+        """
+        Atomically mark a partial story as resuming. Stories still being
+        generated are only taken over once they stop making progress.
+        """
+        now = datetime.now()
+        stale = now - timedelta(seconds=Config.STORY_CLAIM_TIMEOUT)
+        return cls.collection.find_one_and_update(
+            {'_id': story_id, '$or': [
+                {'status': 'partial'},
+                {'status': {'$in': ['pending', 'resuming']}, 'updated_at': {'$lt': stale}}
+            ]},
+            {'$set': {'status': 'resuming', 'updated_at': now}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    def missing_scenes(story):
+        return [i for i, scene in enumerate(story['scenes']) if not scene['text'] or not scene['path']]
+
+    @classmethod
+    def update_status(cls, story_id):
+        story = cls.collection.find_one({'_id': story_id})
+        status = 'partial' if cls.missing_scenes(story) else 'complete'
+        cls.collection.update_one({'_id': story_id}, {'$set': {'status': status}})
+        story['status'] = status
+        return story
@@ -0,0 +1,52 @@
+import math
+from pymongo import MongoClient, DESCENDING, UpdateOne
+from config import Config
+from datetime import datetime
+
+class Trending:
+    collection = MongoClient(Config.MONGO_URI).imagetales.trending_images
+
+    FIELDS = ('title', 'category', 'url', 'likes', 'prompt', 'created_at')
+
+    @classmethod
+    def ensure_indexes(cls):
+        cls.collection.create_index([('score', DESCENDING)])
+        cls.collection.create_index([('category', 1), ('score', DESCENDING)])
+
+    @staticmethod
+    def score(likes, created_at):
+        """
+        Likes decayed by age. ln(likes + 1) + created_at / decay ranks images
+        the same as (likes + 1) * exp(-age / decay), but does not change as time
+        passes, so a stored score only needs updating when likes change.
+        """
+        created_at = created_at or datetime(1970, 1, 1)
+        return math.log(max(likes, 0) + 1) + created_at.timestamp() / Config.TRENDING_DECAY_SECONDS
+
+    @classmethod
+    def _update(cls, image):
+        doc = {field: image.get(field) for field in cls.FIELDS}
+        doc['likes'] = doc['likes'] or 0
+        doc['prompt'] = doc['prompt'] or ''
+        doc['score'] = cls.score(doc['likes'], doc['created_at'])
+        return UpdateOne({'_id': image['_id']}, {'$set': doc}, upsert=True)
+
+    @classmethod
+    def upsert(cls, image):
+        cls.collection.bulk_write([cls._update(image)])
+
+    @classmethod
+    def upsert_many(cls, images):
+        updates = [cls._update(image) for image in images]
+        if updates:
+            cls.collection.bulk_write(updates, ordered=False)
+        return len(updates)
+
+    @classmethod
+    def remove(cls, image_id):
+        cls.collection.delete_one({'_id': image_id})
+
+    @classmethod
+    def top(cls, limit, category=None):
+        query = {'category': category} if category else {}
+        return cls.collection.find(query).sort('score', DESCENDING).limit(limit)
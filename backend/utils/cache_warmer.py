@@ -0,0 +1,113 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from config import Config
+from models.generation_cache import GenerationCache
+from models.prompt_stats import PromptStats
+from utils.image_generator import ImageGenerator
+
+def parse_windows(spec):
+    """
+    "22-6,12-13" -> [(22, 6), (12, 13)], local hours with the end exclusive.
+    Raises ValueError for malformed windows so a bad config fails at startup.
+    """
+    windows = []
+    for window in spec.split(','):
+        window = window.strip()
+        if not window:
+            continue
+        try:
+            start, end = (int(hour) for hour in window.split('-'))
+        except ValueError:
+            raise ValueError(f"Invalid CACHE_WARM_WINDOWS entry '{window}', expected 'start-end'")
+        if not 0 <= start <= 23 or not 0 <= end <= 24 or start == end:
+            raise ValueError(f"Invalid CACHE_WARM_WINDOWS entry '{window}', hours must be 0-24 and differ")
+        windows.append((start, end))
+    return windows
+
+WINDOWS = parse_windows(Config.CACHE_WARM_WINDOWS)
+
+class CacheWarmer:
+    """
+    Background job pre-generating popular prompts into the generation cache.
+    It only runs inside the configured off-peak windows and never spends more
+    than CACHE_WARM_DAILY_QUOTA upstream generations per day.
+    """
+    _thread = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def in_window(hour):
+        # A window like (22, 6) wraps past midnight
+        return any(
+            start <= hour < end if start < end else hour >= start or hour < end
+            for start, end in WINDOWS
+        )
+
+    @classmethod
+    def run_once(cls, now=None):
+        now = now or datetime.now()
+        if Config.CACHE_WARM_DAILY_QUOTA <= 0 or not cls.in_window(now.hour):
+            return 0
+
+        margin = timedelta(hours=Config.CACHE_REFRESH_MARGIN_HOURS)
+        warmed = 0
+        for prompt in PromptStats.popular(Config.CACHE_WARM_TOP_PROMPTS):
+            if GenerationCache.is_fresh(prompt, margin) or GenerationCache.should_skip(prompt):
+                continue
+            if not cls.in_window(datetime.now().hour):
+                break
+            if not GenerationCache.take_quota(Config.CACHE_WARM_DAILY_QUOTA):
+                break
+            # One failing prompt must not stop the rest of the run
+            try:
+                started = time.perf_counter()
+                image_path, generated_prompt = ImageGenerator.generate_image(prompt)
+                GenerationCache.record_warm(time.perf_counter() - started)
+            except Exception as e:
+                print(f"Cache warming failed for prompt '{prompt}': {e}")
+                GenerationCache.record_failure(prompt, str(e))
+                continue
+            if not image_path:
+                GenerationCache.record_failure(prompt, 'No image returned')
+                continue
+            GenerationCache.put(prompt, image_path, generated_prompt, source='warm')
+            GenerationCache.clear_failure(prompt)
+            warmed += 1
+        return warmed
+
+    @classmethod
+    def _loop(cls):
+        # The cache is used by /image/generate even when warming is off, so
+        # its indexes and purging run here regardless of the quota
+        try:
+            GenerationCache.ensure_indexes()
+            PromptStats.ensure_indexes()
+        except Exception as e:
+            print(f"Creating generation cache indexes failed: {e}")
+        while True:
+            try:
+                purged = GenerationCache.purge_expired()
+                if purged:
+                    print(f"Purged {purged} expired generation cache entries")
+            except Exception as e:
+                print(f"Purging the generation cache failed: {e}")
+            try:
+                warmed = cls.run_once()
+                if warmed:
+                    report = GenerationCache.report(24, cls.in_window)
+                    print(f"Cache warmer generated {warmed} prompts, "
+                          f"24h hit rate {report['all']['hit_rate']:.1%}, "
+                          f"peak warm hit rate {report['peak']['warm_hit_rate']:.1%}")
+            except Exception as e:
+                print(f"Cache warming failed: {e}")
+            time.sleep(Config.CACHE_WARM_INTERVAL)
+
+    @classmethod
+    def start(cls):
+        if Config.CACHE_WARM_INTERVAL <= 0:
+            return
+        with cls._lock:
+            if cls._thread is None:
+                cls._thread = threading.Thread(target=cls._loop, name='cache-warmer', daemon=True)
+                cls._thread.start()
@@ -2,6 +2,7 @@ import base64
 import os
 import mimetypes
 import time
+import uuid
 from google import genai
 from google.genai import types
 
@@ -64,6 +65,36 @@ class ImageGenerator:
         f.close()
         return file_name
 
+    @staticmethod
+    def unique_file_name(prefix, mime_type):
+        # Results are cached and shared, so names must not collide within a second
+        file_extension = mimetypes.guess_extension(mime_type) or ".png"
+        return f"{prefix}_{time.time_ns()}_{uuid.uuid4().hex[:8]}{file_extension}"
+
+    @staticmethod
+    def parse_story_text(story_text):
+        """Split story text into its introduction and the text of each scene."""
+        introduction = ""
+        scenes = []
+        current_scene = None
+
+        for line in story_text.strip().split('\n'):
+            line = line.strip()
+            if not line:  # Skip empty lines
+                continue
+            if line.startswith("Introduction:"):
+                introduction = line.replace("Introduction:", "").strip()
+            elif line.startswith("Scene"):
+                if current_scene:
+                    scenes.append(current_scene)
+                current_scene = line
+            elif current_scene:
+                current_scene += " " + line
+
+        if current_scene:
+            scenes.append(current_scene)
+        return introduction, [scene.split(':', 1)[1].strip() if ':' in scene else scene for scene in scenes]
+
     @staticmethod
     def generate_image(prompt):
         client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
@@ -88,11 +119,8 @@ class ImageGenerator:
             if not chunk.candidates or not chunk.candidates[0].content or not chunk.candidates[0].content.parts:
                 continue
             if chunk.candidates[0].content.parts[0].inline_data:
-                timestamp = int(time.time())
-                file_name = f"generated_image_{timestamp}"
                 inline_data = chunk.candidates[0].content.parts[0].inline_data
-                file_extension = mimetypes.guess_extension(inline_data.mime_type) or ".png"
-                full_file_name = f"{file_name}{file_extension}"
+                full_file_name = ImageGenerator.unique_file_name("generated_image", inline_data.mime_type)
                 saved_path = ImageGenerator.save_binary_file(full_file_name, inline_data.data)
                 print(f"File of mime type {inline_data.mime_type} saved to: {saved_path}")
                 return saved_path, prompt
@@ -126,11 +154,8 @@ class ImageGenerator:
             if not chunk.candidates or not chunk.candidates[0].content or not chunk.candidates[0].content.parts:
                 continue
             if chunk.candidates[0].content.parts[0].inline_data:
-                timestamp = int(time.time())
-                file_name = f"modified_image_{timestamp}"
                 inline_data = chunk.candidates[0].content.parts[0].inline_data
-                file_extension = mimetypes.guess_extension(inline_data.mime_type) or ".png"
-                full_file_name = f"{file_name}{file_extension}"
+                full_file_name = ImageGenerator.unique_file_name("modified_image", inline_data.mime_type)
                 saved_path = ImageGenerator.save_binary_file(full_file_name, inline_data.data)
                 print(f"Modified file saved to: {saved_path}")
                 return saved_path, combined_prompt
@@ -139,7 +164,7 @@ class ImageGenerator:
         return None, None
 
     @staticmethod
-    def generate_story(story_prompt, num_images):
+    def generate_story(story_prompt, num_images, on_image=None):
         client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
 
         model = "gemini-2.0-flash-exp-image-generation"
@@ -168,62 +193,55 @@ class ImageGenerator:
         # Process the streaming response
         story_text = ""
         image_paths = []
-        for chunk in client.models.generate_content_stream(
-            model=model,
-            contents=contents,
-            config=generate_content_config,
-        ):
-            if not chunk.candidates or not chunk.candidates[0].content or not chunk.candidates[0].content.parts:
-                continue
-            if chunk.candidates[0].content.parts[0].inline_data:
-                timestamp = int(time.time())
-                file_name = f"story_image_{timestamp}"
-                inline_data = chunk.candidates[0].content.parts[0].inline_data
-                file_extension = mimetypes.guess_extension(inline_data.mime_type) or ".png"
-                full_file_name = f"{file_name}{file_extension}"
-                saved_path = ImageGenerator.save_binary_file(full_file_name, inline_data.data)
-                print(f"Story image of mime type {inline_data.mime_type} saved to: {saved_path}")
-                image_paths.append(saved_path)
-            else:
-                story_text += chunk.text
+        stream_error = None
+        try:
+            for chunk in client.models.generate_content_stream(
+                model=model,
+                contents=contents,
+                config=generate_content_config,
+            ):
+                if not chunk.candidates or not chunk.candidates[0].content or not chunk.candidates[0].content.parts:
+                    continue
+                if chunk.candidates[0].content.parts[0].inline_data:
+                    inline_data = chunk.candidates[0].content.parts[0].inline_data
+                    full_file_name = ImageGenerator.unique_file_name("story_image", inline_data.mime_type)
+                    saved_path = ImageGenerator.save_binary_file(full_file_name, inline_data.data)
+                    print(f"Story image of mime type {inline_data.mime_type} saved to: {saved_path}")
+                    image_paths.append(saved_path)
+                    # The text of a scene comes before its image, so both can be
+                    # persisted as soon as the image is written
+                    index = len(image_paths) - 1
+                    if on_image and index < num_images:
+                        introduction, scenes = ImageGenerator.parse_story_text(story_text)
+                        on_image(index, saved_path, introduction, scenes[index] if index < len(scenes) else None)
+                else:
+                    story_text += chunk.text
+        except Exception as e:
+            # Keep whatever text and images arrived so the story can be resumed
+            stream_error = str(e)
+            print(f"Story stream failed: {stream_error}")
 
         # Debugging output
         print(f"Debug: Raw story text:\n{story_text}")
         print(f"Debug: Image paths: {image_paths}")
 
         # Parse the story text into introduction and scenes
-        lines = story_text.strip().split('\n')
-        introduction = ""
-        scenes = []
-        current_scene = None
-
-        for line in lines:
-            line = line.strip()
-            if not line:  # Skip empty lines
-                continue
-            if line.startswith("Introduction:"):
-                introduction = line.replace("Introduction:", "").strip()
-            elif line.startswith("Scene"):
-                if current_scene:
-                    scenes.append(current_scene)
-                current_scene = line
-            elif current_scene:
-                current_scene += " " + line
-
-        if current_scene:
-            scenes.append(current_scene)
+        introduction, scenes = ImageGenerator.parse_story_text(story_text)
 
         # Debugging parsed scenes
         print(f"Debug: Parsed scenes: {scenes}")
 
+        # The last scene may have been cut off when the stream failed
+        if stream_error and scenes:
+            scenes = scenes[:-1]
+
         # Ensure we have the correct number of scenes and images
         scenes = scenes[:num_images]
         image_paths = image_paths[:num_images]
 
         # Build the result
-        story_result = {'introduction': introduction, 'scenes': []}
-        for i, scene in enumerate(scenes):
-            scene_text = scene.split(':', 1)[1].strip() if ':' in scene else scene
+        story_result = {'introduction': introduction, 'scenes': [], 'error': stream_error}
+        for i, scene_text in enumerate(scenes):
             image_path = image_paths[i] if i < len(image_paths) else None
             story_result['scenes'].append({
                 'text': scene_text,
@@ -233,6 +251,56 @@ class ImageGenerator:
 
         return story_result
 
+    @staticmethod
+    def generate_scene(story_prompt, introduction, scene_number, num_images, with_image=True):
+        client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+
+        # Text-only requests are for scenes whose image was already generated
+        model = "gemini-2.0-flash-exp-image-generation" if with_image else "gemini-2.0-flash"
+        image_request = ", and generate an image for it" if with_image else ""
+        contents = [
+            types.Content(
+                role="user",
+                parts=[
+                    types.Part.from_text(
+                        text=f"A story about '{story_prompt}' has {num_images} scenes and starts with: "
+                             f"{introduction or ''}\n"
+                             f"Write only scene {scene_number} as a concise paragraph suitable for generating "
+                             f"an image{image_request}. Format the output as:\n"
+                             f"Scene {scene_number}: [text]"
+                    ),
+                ],
+            ),
+        ]
+        generate_content_config = types.GenerateContentConfig(
+            response_modalities=["image", "text"] if with_image else ["text"],
+            response_mime_type="text/plain",
+        )
+
+        scene_text = ""
+        image_path = None
+        for chunk in client.models.generate_content_stream(
+            model=model,
+            contents=contents,
+            config=generate_content_config,
+        ):
+            if not chunk.candidates or not chunk.candidates[0].content or not chunk.candidates[0].content.parts:
+                continue
+            if chunk.candidates[0].content.parts[0].inline_data:
+                if image_path:
+                    continue
+                inline_data = chunk.candidates[0].content.parts[0].inline_data
+                full_file_name = ImageGenerator.unique_file_name("story_image", inline_data.mime_type)
+                image_path = ImageGenerator.save_binary_file(full_file_name, inline_data.data)
+                print(f"Story scene image of mime type {inline_data.mime_type} saved to: {image_path}")
+            else:
+                scene_text += chunk.text
+
+        scene_text = " ".join(line.strip() for line in scene_text.strip().split('\n') if line.strip())
+        if ':' in scene_text and scene_text.startswith("Scene"):
+            scene_text = scene_text.split(':', 1)[1].strip()
+        return scene_text or None, image_path
+
 if __name__ == "__main__":
     if "GEMINI_API_KEY" not in os.environ:
         print("Error: GEMINI_API_KEY environment variable not set")
@@ -0,0 +1,141 @@
+import base64
+import gzip
+import json
+import zlib
+from datetime import date, datetime
+from bson.objectid import ObjectId
+from flask import Response, request
+from config import Config
+
+# orjson and brotli are optional, fall back to the stdlib when missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (bytes, bytearray)):
+        return base64.b64encode(obj).decode('ascii')
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class Serializer:
+
+    @staticmethod
+    def dumps(obj):
+        """Encode obj to JSON bytes, handling ObjectId, datetime and bytes."""
+        if orjson is not None:
+            return orjson.dumps(obj, default=_default)
+        return json.dumps(obj, default=_default, separators=(',', ':')).encode('utf-8')
+
+    @staticmethod
+    def choose_encoding():
+        # best_match honours q-values, so "gzip;q=0" is never picked
+        offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+        return request.accept_encodings.best_match(offered)
+
+    @staticmethod
+    def _compressor(encoding):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=Config.BROTLI_QUALITY)
+            return compressor.process, compressor.finish
+        # wbits=31 writes a gzip header and trailer around the deflate stream
+        compressor = zlib.compressobj(Config.GZIP_LEVEL, zlib.DEFLATED, 31)
+        return compressor.compress, compressor.flush
+
+    @staticmethod
+    def compress(body, encoding):
+        if encoding == 'br':
+            return brotli.compress(body, quality=Config.BROTLI_QUALITY)
+        return gzip.compress(body, compresslevel=Config.GZIP_LEVEL)
+
+    @staticmethod
+    def response(obj, status=200):
+        """Serialize a single object, compressing it when it is large enough."""
+        body = Serializer.dumps(obj)
+        headers = {'Vary': 'Accept-Encoding'}
+        encoding = Serializer.choose_encoding()
+        if encoding and len(body) >= Config.COMPRESS_MIN_SIZE:
+            body = Serializer.compress(body, encoding)
+            headers['Content-Encoding'] = encoding
+        return Response(body, status=status, mimetype='application/json', headers=headers)
+
+    @staticmethod
+    def iter_list(rows, row_fn):
+        """Yield a JSON array chunk by chunk, encoding one row at a time."""
+        yield b'['
+        first = True
+        for row in rows:
+            if first:
+                first = False
+                yield Serializer.dumps(row_fn(row))
+            else:
+                yield b',' + Serializer.dumps(row_fn(row))
+        yield b']'
+
+    @staticmethod
+    def stream_list(rows, row_fn, status=200):
+        """
+        Stream a JSON array built from rows (e.g. a Mongo cursor) without
+        materializing the list or the full encoded body. Chunks are buffered
+        until COMPRESS_MIN_SIZE, small lists are sent as a plain body and
+        larger ones are compressed incrementally as they are streamed.
+        """
+        chunks = Serializer.iter_list(rows, row_fn)
+        buffered = []
+        size = 0
+        for chunk in chunks:
+            buffered.append(chunk)
+            size += len(chunk)
+            if size >= Config.COMPRESS_MIN_SIZE:
+                break
+        else:
+            return Serializer._plain(b''.join(buffered), status)
+
+        headers = {'Vary': 'Accept-Encoding'}
+        encoding = Serializer.choose_encoding()
+        if encoding:
+            headers['Content-Encoding'] = encoding
+            body = Serializer._compressed_stream(buffered, chunks, encoding)
+        else:
+            body = Serializer._chain(buffered, chunks)
+        return Response(body, status=status, mimetype='application/json', headers=headers)
+
+    @staticmethod
+    def _plain(body, status):
+        return Response(body, status=status, mimetype='application/json',
+                        headers={'Vary': 'Accept-Encoding'})
+
+    @staticmethod
+    def _chain(buffered, chunks):
+        yield b''.join(buffered)
+        for chunk in chunks:
+            yield chunk
+
+    @staticmethod
+    def _compressed_stream(buffered, chunks, encoding):
+        process, finish = Serializer._compressor(encoding)
+        pending = [process(b''.join(buffered))]
+        pending_size = len(pending[0])
+        for chunk in chunks:
+            out = process(chunk)
+            if out:
+                pending.append(out)
+                pending_size += len(out)
+            # Avoid sending many tiny chunks, flush once enough output piles up
+            if pending_size >= Config.STREAM_CHUNK_SIZE:
+                yield b''.join(pending)
+                pending = []
+                pending_size = 0
+        pending.append(finish())
+        yield b''.join(pending)
@@ -0,0 +1,65 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from pymongo import MongoClient
+from config import Config
+from models.image import Image
+from models.facet import Facet
+from models.trending import Trending
+
+class StatsRefresher:
+    """
+    Background job keeping the category facets and the trending view up to
+    date. The first run builds both from scratch, later runs only re-score
+    images whose updated_at moved past the last watermark and recount the
+    facets every FACET_RECOUNT_INTERVAL.
+    """
+    state = MongoClient(Config.MONGO_URI).imagetales.job_state
+    JOB_ID = 'gallery_stats'
+
+    _thread = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def run_once(cls):
+        started_at = datetime.now()
+        job = cls.state.find_one({'_id': cls.JOB_ID})
+        if not job:
+            Facet.ensure_indexes()
+            Trending.ensure_indexes()
+            Image.collection.create_index('updated_at')
+            since = None
+        else:
+            # Overlap with the previous run so writes racing the watermark are not lost
+            since = job['watermark'] - timedelta(seconds=Config.STATS_REFRESH_OVERLAP)
+
+        update = {'watermark': started_at}
+        # Recount facets periodically so a count skipped during a recount gets fixed
+        counted_at = job.get('facets_counted_at') if job else None
+        if not counted_at or counted_at < started_at - timedelta(seconds=Config.FACET_RECOUNT_INTERVAL):
+            Facet.rebuild(Image.collection)
+            update['facets_counted_at'] = started_at
+
+        update['refreshed'] = Trending.upsert_many(Image.find_updated_since(since))
+        cls.state.update_one({'_id': cls.JOB_ID}, {'$set': update}, upsert=True)
+        return update['refreshed']
+
+    @classmethod
+    def _loop(cls):
+        while True:
+            try:
+                refreshed = cls.run_once()
+                print(f"Gallery stats refreshed: {refreshed} images")
+            except Exception as e:
+                print(f"Gallery stats refresh failed: {e}")
+            # With refreshing disabled the views are still built once
+            if Config.STATS_REFRESH_INTERVAL <= 0:
+                return
+            time.sleep(Config.STATS_REFRESH_INTERVAL)
+
+    @classmethod
+    def start(cls):
+        with cls._lock:
+            if cls._thread is None:
+                cls._thread = threading.Thread(target=cls._loop, name='gallery-stats', daemon=True)
+                cls._thread.start()
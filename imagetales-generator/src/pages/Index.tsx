@@ -41,7 +41,13 @@ const Index = () => {
   const [isGenerating, setIsGenerating] = useState(false);
   const [activeTab, setActiveTab] = useState('create');
   const [generatedImage, setGeneratedImage] = useState<string | null>(null);
-  const [storyData, setStoryData] = useState<{ introduction: string; scenes: { text: string; image: string; prompt: string; timestamp: string }[] } | null>(null);
+  const [storyData, setStoryData] = useState<{
+    storyId: string;
+    status: string;
+    missingScenes: number[];
+    introduction: string;
+    scenes: { text: string | null; image: string | null; prompt: string | null; timestamp: string | null }[];
+  } | null>(null);
   const [currentPrompt, setCurrentPrompt] = useState<string | null>(null);
   const [showSaveDialog, setShowSaveDialog] = useState(false);
   const [imageTitle, setImageTitle] = useState('');
@@ -123,6 +129,48 @@ const Index = () => {
     }
   };
 
+  const showStory = (data: any) => {
+    setStoryData({
+      storyId: data.story_id,
+      status: data.status,
+      missingScenes: data.missing_scenes || [],
+      introduction: data.introduction,
+      scenes: data.scenes.map((scene: any) => ({
+        text: scene.text,
+        image: scene.image ? `http://localhost:5000${scene.image}` : null,
+        prompt: scene.prompt,
+        timestamp: scene.timestamp
+      }))
+    });
+    if (data.status === 'complete') {
+      toast({
+        title: "Story created!",
+        description: "Your story with images has been generated",
+      });
+    } else {
+      toast({
+        title: "Story partially created",
+        description: `${data.missing_scenes.length} scene(s) are missing, resume to generate only those`,
+      });
+    }
+  };
+
+  const handleResumeStory = async () => {
+    if (!storyData) return;
+    setIsGenerating(true);
+    try {
+      const response = await api.post(`/image/story/${storyData.storyId}/resume`);
+      showStory(response.data);
+    } catch (error: any) {
+      toast({
+        title: "Error",
+        description: error.response?.data?.error || "Failed to resume story",
+      });
+    } finally {
+      setIsGenerating(false);
+    }
+  };
+
   const handleGenerateStory = async () => {
     if (!storyPrompt.trim()) {
       toast({
@@ -145,21 +193,9 @@ const Index = () => {
         story_prompt: storyPrompt,
         num_images: numStoryImages
       });
-      setStoryData({
-        introduction: response.data.introduction,
-        scenes: response.data.scenes.map((scene: any) => ({
-          text: scene.text,
-          image: `http://localhost:5000${scene.image}`,
-          prompt: scene.prompt,
-          timestamp: scene.timestamp
-        }))
-      });
+      showStory(response.data);
       setGeneratedImage(null);
       setCurrentPrompt(null);
-      toast({
-        title: "Story created!",
-        description: "Your story with images has been generated",
-      });
     } catch (error: any) {
       toast({
         title: "Error",
@@ -437,7 +473,22 @@ const Index = () => {
                       <div className="text-muted-foreground">
                         <p>{storyData.introduction}</p>
                       </div>
-                      {storyData.scenes.map((scene, index) => (
+                      {storyData.status !== 'complete' && (
+                        <div className="flex items-center justify-between gap-4 rounded-md border border-border/40 p-3">
+                          <p className="text-sm text-muted-foreground">
+                            {storyData.missingScenes.length} scene(s) could not be generated.
+                          </p>
+                          <Button size="sm" onClick={handleResumeStory} disabled={isGenerating}>
+                            Resume story
+                          </Button>
+                        </div>
+                      )}
+                      {storyData.scenes.map((scene, index) => !scene.image ? (
+                        <div key={index}>
+                          <h4 className="font-semibold mb-2">Scene {index + 1}:</h4>
+                          <p className="text-muted-foreground mb-4">{scene.text || "This scene is missing."}</p>
+                        </div>
+                      ) : (
                         <div key={index} className="relative group">
                           <h4 className="font-semibold mb-2">Scene {index + 1}:</h4>
                           <p className="text-muted-foreground mb-4">{scene.text}</p>
@@ -470,7 +521,7 @@ const Index = () => {
                             </motion.div>
                             <motion.div whileHover={{ scale: 1.1 }} whileTap={{ scale: 0.9 }}>
                               <Button 
-                                onClick={() => handleDownload(scene.image)}
+                                onClick={() => handleDownload(scene.image as string)}
                                 variant="secondary" 
                                 size="sm" 
                                 className="flex items-center gap-1 rounded-full px-3 shadow-md"